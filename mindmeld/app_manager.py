@@ -280,12 +280,11 @@ class ApplicationManager:
 
     def _post_dm(self, request, dm_response):
         # Append this item to the history, but don't recursively store history
-        prev_request = DialogueResponder.to_json(dm_response)
-        prev_request.pop("history")
+        prev_request = DialogueResponder.to_json(dm_response, exclude=("history",))
 
-        # limit length of history
-        new_history = (prev_request,) + request.history
-        dm_response.history = new_history[: self.MAX_HISTORY_LEN]
+        # limit length of history, copying only the turns which will be kept
+        prev_history = request.history[: self.MAX_HISTORY_LEN - 1]
+        dm_response.history = ((prev_request,) + prev_history)[: self.MAX_HISTORY_LEN]
 
         # validate outgoing params
         dm_response.params.validate_param("allowed_intents")
@@ -15,9 +15,10 @@
 This module contains the Config class.
 """
 import copy
-import imp
+import importlib.util
 import logging
 import os
+import sys
 import warnings
 
 from .. import path
@@ -25,6 +26,9 @@ from .request import validate_language_code, validate_locale_code
 
 logger = logging.getLogger(__name__)
 
+# modification times of the app config modules loaded by _get_config_module
+_config_module_mtimes = {}
+
 DUCKLING_SERVICE_NAME = "duckling"
 DEFAULT_DUCKLING_URL = "http://localhost:7151/parse"
 
@@ -706,7 +710,7 @@ def get_parser_config(app_path=None, config=None, domain=None, intent=None):
         pass
     if config_provider:
         try:
-            config = config or config_provider(domain, intent)
+            config = config or copy.deepcopy(config_provider(domain, intent))
             return _expand_parser_config(config)
         except Exception as exc:  # pylint: disable=broad-except
             # Note: this is intentionally broad -- provider could raise any exception
@@ -714,7 +718,7 @@ def get_parser_config(app_path=None, config=None, domain=None, intent=None):
 
     # Try object second
     try:
-        config = config or module_conf.PARSER_CONFIG
+        config = config or copy.deepcopy(module_conf.PARSER_CONFIG)
         return _expand_parser_config(config)
     except AttributeError:
         pass
@@ -833,10 +837,28 @@ def _expand_group_config(group_config):
 
 def _get_config_module(app_path):
     module_path = path.get_config_module_path(app_path)
-
-    config_module = imp.load_source(
-        "config_module_" + os.path.basename(app_path), module_path
-    )
+    module_name = "config_module_" + os.path.basename(app_path)
+    mtime = os.path.getmtime(module_path)
+
+    # reuse the module if this config file was already executed and has not changed since
+    config_module = sys.modules.get(module_name)
+    if (
+        config_module is not None
+        and getattr(config_module, "__file__", None) == module_path
+        and _config_module_mtimes.get(module_name) == mtime
+    ):
+        return config_module
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    config_module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = config_module
+    try:
+        spec.loader.exec_module(config_module)
+    except Exception:
+        # don't leave a half-initialized module behind for the next lookup
+        sys.modules.pop(module_name, None)
+        raise
+    _config_module_mtimes[module_name] = mtime
     return config_module
 
 
@@ -874,7 +896,7 @@ def get_nlp_config(app_path=None, config=None):
 
     # Try object second
     try:
-        config = config or module_conf.NLP_CONFIG
+        config = config or copy.deepcopy(module_conf.NLP_CONFIG)
         return config
     except AttributeError:
         pass
@@ -13,13 +13,16 @@
 
 """This module contains the dialogue manager component of MindMeld"""
 import asyncio
+import bisect
 import copy
+import heapq
 import json
 import logging
 import random
-from functools import cmp_to_key, partial
+from functools import partial
 
 import immutables
+import numpy as np
 
 from .. import path
 from .request import FrozenParams, Params, Request
@@ -27,6 +30,10 @@ from .request import FrozenParams, Params, Request
 mod_logger = logging.getLogger(__name__)
 
 
+# equivalent to json.dumps(obj, indent=4, sort_keys=True), without a new encoder per call
+_PRETTY_ENCODER = json.JSONEncoder(indent=4, sort_keys=True)
+
+
 class DirectiveNames:
     """A constants object for directive names."""
 
@@ -52,6 +59,13 @@ class DirectiveNames:
     """A directive to put the client to sleep after a specified number of milliseconds."""
 
 
+# directives whose payload text is shown as is by Conversation
+_TEXT_DIRECTIVES = frozenset((DirectiveNames.REPLY, DirectiveNames.SPEAK))
+
+# the bits of one word of a packed entity type mask in DialogueManager.match_batch
+_WORD_MASK = (1 << 64) - 1
+
+
 class DirectiveTypes:
     """A constants object for directive types."""
 
@@ -81,6 +95,19 @@ class DialogueStateRule:
         default (bool): Whether this is the default state.
     """
 
+    __slots__ = (
+        "dialogue_state",
+        "domain",
+        "intent",
+        "entity_types",
+        "targeted_only",
+        "default",
+        "_complexity",
+        "_neg_complexity",
+        "_entity_type",
+        "_sig",
+    )
+
     logger = mod_logger.getChild("DialogueStateRule")
     """Class logger."""
 
@@ -127,9 +154,9 @@ class DialogueStateRule:
                         msg.format(single, plural, self.__class__.__name__)
                     )
                 if single in kwargs:
-                    resolved[plural] = {kwargs[single]}
+                    resolved[plural] = (kwargs[single],)
                 if plural in kwargs:
-                    resolved[plural] = set(kwargs[plural])
+                    resolved[plural] = kwargs[plural]
             elif keys[0] in kwargs:
                 resolved[keys[0]] = kwargs[keys[0]]
 
@@ -137,14 +164,9 @@ class DialogueStateRule:
         self.intent = resolved.get("intent", None)
         self.targeted_only = resolved.get("targeted_only", False)
         self.default = resolved.get("default", False)
-        entities = resolved.get("has_entities", None)
-        self.entity_types = None
-        if entities is not None:
-            for entity in entities:
-                if not isinstance(entity, str):
-                    msg = "Invalid entity specification for dialogue state rule: {!r}"
-                    raise ValueError(msg.format(entities))
-            self.entity_types = frozenset(entities)
+        self.entity_types = self._resolve_entity_types(
+            resolved.get("has_entities", None)
+        )
 
         if self.targeted_only and any([self.domain, self.intent, self.entity_types]):
             raise ValueError(
@@ -160,11 +182,66 @@ class DialogueStateRule:
                 "domain, intent, has_entity, and targeted_only must be omitted"
             )
 
-    def apply(self, request):
+        self._complexity = (
+            len(self.entity_types) if self.entity_types else 0,
+            1 if self.intent else 0,
+            1 if self.domain else 0,
+            1 if self.default else 0,
+        )
+        # ascending order of this key is descending order of complexity
+        self._neg_complexity = tuple(-c for c in self._complexity)
+        self._entity_type = (
+            next(iter(self.entity_types))
+            if self.entity_types is not None and len(self.entity_types) == 1
+            else None
+        )
+        self._sig = (
+            self.dialogue_state,
+            self.domain,
+            self.intent,
+            self.entity_types,
+            self.targeted_only,
+            self.default,
+        )
+
+    @staticmethod
+    def _resolve_entity_types(entities):
+        """Normalizes the entity types of a rule to a frozenset.
+
+        Args:
+            entities (str, list, tuple, set, frozenset): A single entity type or a collection of
+                entity types.
+
+        Returns:
+            (frozenset): The entity types, or None if no entity types were specified.
+        """
+        if entities is None:
+            return None
+
+        msg = "Invalid entity specification for dialogue state rule: {!r}"
+        if isinstance(entities, frozenset):
+            entity_types = entities
+        elif isinstance(entities, str):
+            entity_types = frozenset((entities,))
+        else:
+            try:
+                entity_types = frozenset(entities)
+            except TypeError:
+                raise ValueError(msg.format(entities))
+
+        for entity_type in entity_types:
+            if not isinstance(entity_type, str):
+                raise ValueError(msg.format(entities))
+        return entity_types
+
+    def apply(self, request, entity_types=None):
         """Applies the dialogue state rule to the given context.
 
         Args:
             request (Request): A request object.
+            entity_types (frozenset, optional): The entity types present in the request. When
+                matching many rules against the same request, these should be computed once
+                and passed in; otherwise they are computed from the request.
 
         Returns:
             (bool): Whether or not the context matches.
@@ -176,21 +253,27 @@ class DialogueStateRule:
             return False
 
         # check domain is correct
-        if self.domain is not None and self.domain != request.domain:
+        domain = self.domain
+        if domain is not None and domain != request.domain:
             return False
 
         # check intent is correct
-        if self.intent is not None and self.intent != request.intent:
+        intent = self.intent
+        if intent is not None and intent != request.intent:
             return False
 
         # check expected entity types are present
-        if self.entity_types is not None:
-            # TODO cache entity types
-            entity_types = set()
-            for entity in request.entities:
-                entity_types.add(entity["type"])
-
-            if len(self.entity_types & entity_types) < len(self.entity_types):
+        required = self.entity_types
+        if required is not None:
+            if entity_types is None:
+                entity_types = frozenset(entity["type"] for entity in request.entities)
+
+            # most rules require a single entity type, which needs no subset check
+            entity_type = self._entity_type
+            if entity_type is not None:
+                if entity_type not in entity_types:
+                    return False
+            elif not required.issubset(entity_types):
                 return False
 
         return True
@@ -202,29 +285,18 @@ class DialogueStateRule:
         default rule, domains, intents, entity types, entity mappings.
 
         Returns:
-            (int): A number representing the rule complexity.
+            (tuple): A tuple representing the rule complexity.
         """
-        complexity = [0] * 4
-
-        if self.entity_types:
-            complexity[0] = len(self.entity_types)
-
-        if self.intent:
-            complexity[1] = 1
-
-        if self.domain:
-            complexity[2] = 1
-
-        if self.default:
-            complexity[3] = 1
-
-        return tuple(complexity)
+        return self._complexity
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return self._sig == other._sig
         raise NotImplementedError
 
+    def __hash__(self):
+        return hash(self._sig)
+
     def __ne__(self, other):
         if isinstance(other, self.__class__):
             return not self.__eq__(other)
@@ -264,8 +336,15 @@ class DialogueManager:
         self.handler_map = {}
         self.middlewares = []
         self.rules = []
+        self._keys = []
         self.responder_class = responder_class or DialogueResponder
         self.default_rule = None
+        # rules bucketed by their (domain, intent) pattern, where None acts as a wildcard
+        self._by_domain_intent = {}
+        # merged candidate rules for each (domain, intent) seen in a request
+        self._candidates = {}
+        # the rule registered last for each dialogue state name, for targeted lookups
+        self._state_to_rule = {}
 
     def handle(self, **kwargs):
         """A decorator that is used to register dialogue state rules."""
@@ -328,8 +407,17 @@ class DialogueManager:
             raise TypeError(msg.format(name))
 
         rule = DialogueStateRule(name, **kwargs)
-        self.rules.append(rule)
-        self.rules.sort(key=cmp_to_key(DialogueStateRule.compare), reverse=True)
+        # keep rules sorted by decreasing complexity, and rules of equal complexity in
+        # registration order, without resorting the whole list
+        sort_key = (rule._neg_complexity, len(self.rules))
+        idx = bisect.bisect_left(self._keys, sort_key)
+        self._keys.insert(idx, sort_key)
+        self.rules.insert(idx, rule)
+
+        bucket = self._by_domain_intent.setdefault((rule.domain, rule.intent), [])
+        bisect.insort(bucket, (sort_key, rule))
+        self._candidates.clear()
+        self._state_to_rule[name] = rule
         if handler is not None:
             old_handler = self.handler_map.get(name)
             if old_handler is not None and old_handler != handler:
@@ -492,15 +580,119 @@ class DialogueManager:
             message="reprocess", target_dialogue_state=target_dialogue_state
         )
 
-    def _get_dialogue_state(self, request, target_dialogue_state=None):
-        dialogue_state = None
-        for rule in self.rules:
-            if target_dialogue_state:
-                if target_dialogue_state == rule.dialogue_state:
-                    dialogue_state = rule.dialogue_state
+    def match_batch(self, requests, chunk_size=1024):
+        """Finds the dialogue state for each of many requests at once. This gives the same
+        result as resolving each request without a target dialogue state.
+
+        Requests are grouped by domain and intent, and each group is only matched against
+        its candidate rules. Within a group, the entity types a rule requires and the entity
+        types present in a request are packed into bitmasks of 64 bit words, and a rule
+        matches a request when every bit of its mask is set in the request's mask.
+
+        Args:
+            requests (list): A list of Request objects.
+            chunk_size (int, optional): The number of requests matched against the rules at \
+                a time, which bounds the size of the intermediate arrays.
+
+        Returns:
+            (list): The name of the matching dialogue state for each request, or None if no \
+                rule matches it.
+        """
+        states = [None] * len(requests)
+        groups = {}
+        for idx, request in enumerate(requests):
+            groups.setdefault((request.domain, request.intent), []).append(idx)
+
+        for indices in groups.values():
+            rules = []
+            for rule in self._candidate_rules(requests[indices[0]]):
+                if rule.targeted_only:
+                    continue
+                rules.append(rule)
+                # a rule without entity requirements matches everything, so the less
+                # complex rules after it can never be reached
+                if not rule.entity_types:
                     break
+            if not rules:
+                continue
+
+            if rules[0].entity_types:
+                group_states = self._match_entity_types(
+                    rules, [requests[idx] for idx in indices], chunk_size
+                )
             else:
-                if rule.apply(request):
+                group_states = [rules[0].dialogue_state] * len(indices)
+            for idx, dialogue_state in zip(indices, group_states):
+                states[idx] = dialogue_state
+        return states
+
+    @staticmethod
+    def _match_entity_types(rules, requests, chunk_size):
+        """Finds the first rule whose required entity types are all present in each request.
+
+        Args:
+            rules (list): The candidate rules, in order of decreasing complexity.
+            requests (list): Request objects with the same domain and intent.
+            chunk_size (int): The number of requests to match at a time.
+
+        Returns:
+            (list): The name of the matching dialogue state for each request, or None.
+        """
+        type_bits = {}
+        for rule in rules:
+            for entity_type in rule.entity_types or ():
+                type_bits.setdefault(entity_type, 1 << len(type_bits))
+        n_words = (len(type_bits) + 63) // 64
+
+        def _pack(masks):
+            # split arbitrarily wide integer masks into columns of 64 bit words
+            words = np.empty((len(masks), n_words), dtype=np.uint64)
+            for word in range(n_words):
+                words[:, word] = [(mask >> (64 * word)) & _WORD_MASK for mask in masks]
+            return words
+
+        rule_masks = _pack(
+            [
+                sum(type_bits[entity_type] for entity_type in rule.entity_types or ())
+                for rule in rules
+            ]
+        )
+        request_masks = []
+        for request in requests:
+            mask = 0
+            for entity in request.entities:
+                mask |= type_bits.get(entity["type"], 0)
+            request_masks.append(mask)
+
+        states = []
+        for begin in range(0, len(request_masks), chunk_size):
+            end = begin + chunk_size
+            masks = _pack(request_masks[begin:end])[:, np.newaxis, :]
+            matches = ((masks & rule_masks) == rule_masks).all(axis=2)
+            # rules are sorted by decreasing complexity, so the first match wins
+            first_matches = matches.argmax(axis=1)
+            states.extend(
+                rules[first].dialogue_state if matched else None
+                for first, matched in zip(
+                    first_matches, matches[np.arange(len(matches)), first_matches]
+                )
+            )
+        return states
+
+    def _get_dialogue_state(self, request, target_dialogue_state=None):
+        dialogue_state = None
+        if target_dialogue_state:
+            rule = self._state_to_rule.get(target_dialogue_state)
+            dialogue_state = rule.dialogue_state if rule else None
+        else:
+            entity_types = None
+            for rule in self._candidate_rules(request):
+                # only build the request's entity types once a rule needs them
+                if entity_types is None and rule.entity_types is not None:
+                    entity_types = frozenset(
+                        entity["type"] for entity in request.entities
+                    )
+                if rule.apply(request, entity_types):
                     dialogue_state = rule.dialogue_state
                     break
         if dialogue_state is None:
@@ -511,6 +703,31 @@ class DialogueManager:
 
         return dialogue_state
 
+    def _candidate_rules(self, request):
+        """Returns the rules which could match the request in order of decreasing complexity.
+
+        Only the buckets whose domain and intent patterns are compatible with the request are
+        merged, so rules for other domains and intents are never evaluated. The merged list
+        is cached per domain and intent until another rule is added.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            (list): The candidate rules.
+        """
+        key = (request.domain, request.intent)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            domain, intent = key
+            keys = {key, (None, intent), (domain, None), (None, None)}
+            buckets = [
+                self._by_domain_intent[k] for k in keys if k in self._by_domain_intent
+            ]
+            candidates = [rule for _, rule in heapq.merge(*buckets)]
+            self._candidates[key] = candidates
+        return candidates
+
     def _get_dialogue_handler(self, dialogue_state):
         handler = (
             self.handler_map[dialogue_state]
@@ -524,7 +741,7 @@ class DialogueManager:
         return handler
 
     def _create_responder(self):
-        return self.responder_class(slots={})
+        return self.responder_class()
 
     @staticmethod
     def _default_handler(context, responder):
@@ -724,11 +941,11 @@ class DialogueResponder:
             dialogue_state (str): The dialogue state.
             directives (list): The directives of the responder.
         """
-        self.directives = directives or []
+        self.directives = directives if directives is not None else []
         self.frame = frame or {}
         self.params = params or Params()
         self.dialogue_state = dialogue_state
-        self.slots = slots or {}
+        self.slots = slots if slots is not None else {}
         self.history = history or []
         self.request = request or Request()
 
@@ -843,21 +1060,24 @@ class DialogueResponder:
         result = items
         if isinstance(items, (tuple, list)):
             result = random.choice(items)
-        elif isinstance(items, set):
+        elif isinstance(items, (set, frozenset)):
             result = random.choice(tuple(items))
         return result
 
     @staticmethod
-    def to_json(instance):
+    def to_json(instance, exclude=()):
         """Convert the responder into a JSON representation.
         Args:
              instance (DialogueResponder): The responder object.
+             exclude (tuple, optional): The names of attributes to leave out.
 
         Returns:
             (dict): The JSON representation.
         """
         serialized_obj = {}
         for attribute, value in vars(instance).items():
+            if attribute in exclude:
+                continue
             if isinstance(value, (Params, Request, FrozenParams)):
                 serialized_obj[attribute] = DialogueResponder.to_json(value)
             elif isinstance(value, immutables.Map):
@@ -1073,28 +1293,20 @@ class Conversation:
         msg = ""
         try:
             directive_name = directive["name"]
-            if directive_name in [DirectiveNames.REPLY, DirectiveNames.SPEAK]:
+            if directive_name in _TEXT_DIRECTIVES:
                 msg = directive["payload"]["text"]
             elif directive_name == DirectiveNames.SUGGESTIONS:
                 suggestions = directive["payload"]
                 if not suggestions:
                     raise ValueError
-                msg = "Suggestion{}:".format("" if len(suggestions) == 1 else "s")
-                texts = []
-                for idx, suggestion in enumerate(suggestions):
-                    if idx > 0:
-                        msg += ", {!r}"
-                    else:
-                        msg += " {!r}"
-
-                    texts.append(self._generate_suggestion_text(suggestion))
-                msg = msg.format(*texts)
+                texts = [self._generate_suggestion_text(sug) for sug in suggestions]
+                msg = "Suggestion{}: {}".format(
+                    "" if len(suggestions) == 1 else "s",
+                    ", ".join([repr(text) for text in texts]),
+                )
             elif directive_name == DirectiveNames.LIST:
                 msg = "\n".join(
-                    [
-                        json.dumps(item, indent=4, sort_keys=True)
-                        for item in directive["payload"]
-                    ]
+                    [_PRETTY_ENCODER.encode(item) for item in directive["payload"]]
                 )
             elif directive_name == DirectiveNames.LISTEN:
                 msg = "Listening..."
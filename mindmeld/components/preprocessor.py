@@ -22,6 +22,16 @@ class Preprocessor(ABC):
     Base class for Preprocessor object
     """
 
+    def compile(self):
+        """
+        Prepares any state which is reused across queries, such as compiled regular
+        expressions. This is called once when the preprocessor is attached to a query factory,
+        before any text is processed. Subclasses which match patterns in ``process`` or
+        ``get_char_index_map`` should compile them here and store them on the instance rather
+        than compiling them on every call.
+        """
+        pass
+
     @abstractmethod
     def process(self, text):
         """
@@ -37,6 +37,8 @@ class QueryFactory:
     ):
         self.tokenizer = tokenizer
         self.preprocessor = preprocessor
+        if callable(getattr(preprocessor, "compile", None)):
+            preprocessor.compile()
         self.stemmer = stemmer
         self.locale = locale
         self.language = language
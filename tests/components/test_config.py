@@ -10,8 +10,17 @@ Tests for config module.
 # pylint: disable=locally-disabled,redefined-outer-name
 
 import os
+import sys
 
-from mindmeld.components._config import _expand_parser_config, get_classifier_config
+import pytest
+
+from mindmeld.components._config import (
+    _expand_parser_config,
+    _get_config_module,
+    get_classifier_config,
+    get_nlp_config,
+    get_parser_config,
+)
 
 APP_PATH = os.path.dirname(os.path.abspath(__file__))
 
@@ -137,3 +146,71 @@ def test_get_classifier_config_func_error():
     expected = {"error": "intent", "penalty": "l2", "C": 100}
 
     assert actual == expected
+
+
+def _write_config(app_path, source, mtime=None):
+    config_path = app_path.join("config.py")
+    config_path.write(source)
+    if mtime is not None:
+        # set the mtime explicitly so a rewrite is noticed even on coarse filesystems
+        os.utime(str(config_path), (mtime, mtime))
+
+
+def test_config_module_reused(tmpdir):
+    """Tests that loading the same config file twice returns the same module."""
+    _write_config(
+        tmpdir, "NLP_CONFIG = {'resolve_entities_using_nbest_transcripts': []}\n"
+    )
+
+    first = _get_config_module(str(tmpdir))
+    second = _get_config_module(str(tmpdir))
+
+    assert first is second
+
+
+def test_config_module_reloaded_on_change(tmpdir):
+    """Tests that rewriting the config file causes it to be reloaded."""
+    _write_config(tmpdir, "VALUE = 1\n", mtime=1000000000)
+    first = _get_config_module(str(tmpdir))
+    assert first.VALUE == 1
+
+    _write_config(tmpdir, "VALUE = 2\n", mtime=1000000010)
+    second = _get_config_module(str(tmpdir))
+
+    assert second.VALUE == 2
+
+
+def test_config_module_error_not_cached(tmpdir):
+    """Tests that a config file which fails to execute is not left in sys.modules."""
+    _write_config(tmpdir, "raise ValueError('bad config')\n")
+
+    with pytest.raises(ValueError):
+        _get_config_module(str(tmpdir))
+    assert "config_module_" + os.path.basename(str(tmpdir)) not in sys.modules
+
+
+def test_get_nlp_config_copy(tmpdir):
+    """Tests that mutating the returned nlp config does not leak into the next call."""
+    _write_config(
+        tmpdir, "NLP_CONFIG = {'system_entity_recognizer': {'type': 'duckling'}}\n"
+    )
+
+    config = get_nlp_config(str(tmpdir))
+    config["system_entity_recognizer"]["type"] = "changed"
+    config["extra"] = True
+
+    assert get_nlp_config(str(tmpdir)) == {
+        "system_entity_recognizer": {"type": "duckling"}
+    }
+
+
+def test_get_parser_config_copy(tmpdir):
+    """Tests that mutating the returned parser config does not leak into the next call."""
+    _write_config(tmpdir, "PARSER_CONFIG = {'store': ['location']}\n")
+
+    config = get_parser_config(str(tmpdir))
+    expected = get_parser_config(str(tmpdir))
+    config["store"]["location"]["max_instances"] = 5
+    config["product"] = {}
+
+    assert get_parser_config(str(tmpdir)) == expected
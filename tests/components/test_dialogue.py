@@ -65,6 +65,14 @@ def test_dialogue_state_rule_equal():
     assert rule1 == rule2
 
 
+def test_dialogue_state_rule_hash():
+    rule1 = DialogueStateRule(dialogue_state="some-state", has_entity="entity_1")
+    rule2 = DialogueStateRule(dialogue_state="some-state", has_entities=["entity_1"])
+    rule3 = DialogueStateRule(dialogue_state="some-state", intent="some-intent")
+    assert hash(rule1) == hash(rule2)
+    assert len({rule1, rule2, rule3}) == 2
+
+
 def test_dialogue_state_rule_not_equal():
     rule1 = DialogueStateRule(dialogue_state="some-state", domain="some-domain")
     rule2 = DialogueStateRule(dialogue_state="some-state-2", domain="some-domain")
@@ -120,6 +128,16 @@ def test_dialogue_state_rule_exception():
     )
     assert rule2.entity_types == frozenset(("entity_2", "entity_3",))
 
+    rule3 = DialogueStateRule(dialogue_state="some-state", has_entities="entity_1")
+    assert rule3.entity_types == frozenset(("entity_1",))
+
+    entity_types = frozenset(("entity_2", "entity_3"))
+    rule4 = DialogueStateRule(dialogue_state="some-state", has_entities=entity_types)
+    assert rule4.entity_types is entity_types
+
+    with pytest.raises(ValueError):
+        DialogueStateRule(dialogue_state="some-state", has_entities=1)
+
     with pytest.raises(ValueError):
         DialogueStateRule(
             dialogue_state="some-state",
@@ -226,6 +244,86 @@ class TestDialogueManager:
         )
         assert result.dialogue_state == "targeted_only"
 
+    def test_target_dialogue_state_unknown(self, dm):
+        """Falls back to the default handler when the target dialogue state is unknown"""
+        request = create_request("domain", "intent")
+        response = create_responder(request)
+        result = dm.apply_handler(request, response, target_dialogue_state="unknown")
+        assert result.dialogue_state is None
+
+    def test_default_handler_override(self):
+        """A subclass can override the handler used when no dialogue state matches"""
+
+        class _DialogueManager(DialogueManager):
+            @staticmethod
+            def _default_handler(request, responder):
+                responder.reply("fallback")
+
+        dm = _DialogueManager()
+        request = create_request("domain", "intent")
+        response = create_responder(request)
+        result = dm.apply_handler(request, response)
+        assert result.dialogue_state is None
+        assert result.directives[0]["payload"]["text"] == "fallback"
+
+    def test_rule_added_after_lookup(self, dm):
+        """Rules added after a request was resolved are considered for the next request"""
+        request = create_request("domain", "intent", [{"type": "entity_4"}])
+        response = create_responder(request)
+        assert dm.apply_handler(request, response).dialogue_state == "domain_intent"
+
+        dm.add_dialogue_rule(
+            "domain_entity_4", lambda x, y: None, domain="domain", has_entity="entity_4"
+        )
+        response = create_responder(request)
+        assert dm.apply_handler(request, response).dialogue_state == "domain_entity_4"
+
+    def test_match_batch(self, dm):
+        """Batch matching agrees with matching requests one at a time"""
+        requests = [
+            create_request("other", "other"),
+            create_request("domain", "other"),
+            create_request("domain", "intent"),
+            create_request("other", "intent"),
+            create_request("domain", "intent", [{"type": "entity_2"}]),
+            create_request(
+                "domain", "intent", [{"type": "entity_1"}, {"type": "entity_2"}]
+            ),
+            create_request(
+                "domain",
+                "intent",
+                [{"type": "entity_1"}, {"type": "entity_2"}, {"type": "entity_3"}],
+            ),
+            create_request("domain", "intent", [{"type": "entity_4"}]),
+        ]
+        expected = [dm._get_dialogue_state(request) for request in requests]
+        assert dm.match_batch(requests) == expected
+        assert DialogueManager().match_batch(requests) == [None] * len(requests)
+
+    def test_match_batch_many_entity_types(self):
+        """Batch matching handles masks wider than one word and several chunks"""
+        dm = DialogueManager()
+        for idx in range(70):
+            dm.add_dialogue_rule(
+                "entity_{}".format(idx),
+                lambda x, y: None,
+                intent="intent",
+                has_entities=["entity_{}".format(idx), "entity_{}".format(69 - idx)],
+            )
+        dm.add_dialogue_rule("intent", lambda x, y: None, intent="intent")
+        dm.add_dialogue_rule("other", lambda x, y: None, intent="other")
+        requests = [
+            create_request(
+                "domain",
+                "intent",
+                [{"type": "entity_{}".format(idx)} for idx in range(start, 70, step)],
+            )
+            for start in range(5)
+            for step in (1, 3, 7)
+        ] + [create_request("domain", "other"), create_request("domain", "unknown")]
+        expected = [dm._get_dialogue_state(request) for request in requests]
+        assert dm.match_batch(requests, chunk_size=4) == expected
+
     def test_targeted_only_kwarg_exclusion(self, dm):
         with pytest.raises(ValueError):
             dm.add_dialogue_rule(
@@ -277,6 +375,50 @@ class TestDialogueManager:
         assert result.dialogue_state == "middleware_test"
 
 
+@pytest.mark.parametrize(
+    "templates",
+    [["Hi", "Hello"], ("Hi", "Hello"), {"Hi", "Hello"}, frozenset(("Hi", "Hello"))],
+)
+def test_responder_reply_choice(templates):
+    responder = DialogueResponder()
+    responder.reply(templates)
+    assert responder.directives[0]["payload"]["text"] in ("Hi", "Hello")
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "Hello {name}",
+        "{name!r} owes {{{amount:.2f}}}",
+        "{name:>{width}}",
+        "{store[name]} is open",
+    ],
+)
+def test_responder_reply_slots(template):
+    slots = {"name": "Homer", "amount": 12.5, "width": 8, "store": {"name": "Elm"}}
+    responder = DialogueResponder(slots=slots)
+    responder.reply(template)
+    assert responder.directives[0]["payload"]["text"] == template.format(**slots)
+
+
+def test_responder_reply_missing_slot():
+    responder = DialogueResponder(slots={"name": "Homer"})
+    with pytest.raises(KeyError):
+        responder.reply("Hello {nickname}")
+
+
+def test_responder_to_json():
+    request = create_request("domain", "intent")
+    responder = DialogueResponder(request=request, history=[{"dialogue_state": "a"}])
+    responder.reply("Hello")
+
+    serialized = DialogueResponder.to_json(responder, exclude=("history",))
+    assert "history" not in serialized
+    assert serialized["directives"] == responder.directives
+    assert serialized["request"]["intent"] == "intent"
+    assert DialogueResponder.to_json(responder)["history"] == responder.history
+
+
 def test_convo_params_are_cleared(kwik_e_mart_nlp, kwik_e_mart_app_path):
     """Tests that the params are cleared in one trip from app to mm."""
     convo = Conversation(nlp=kwik_e_mart_nlp, app_path=kwik_e_mart_app_path)
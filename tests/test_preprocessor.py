@@ -1,5 +1,10 @@
+import re
+
 import pytest
 
+from mindmeld.components import Preprocessor
+from mindmeld.query_factory import QueryFactory
+
 
 @pytest.mark.parametrize(
     "query, expected",
@@ -12,3 +17,25 @@ import pytest
 def test_preprocessor(query_factory, query, expected):
     processed_query = query_factory.create_query(query)
     assert expected == processed_query.processed_text
+
+
+def test_preprocessor_compiled_once(tokenizer):
+    class CompilingPreprocessor(Preprocessor):
+        def __init__(self):
+            self.compile_count = 0
+            self._pattern = None
+
+        def compile(self):
+            self.compile_count += 1
+            self._pattern = re.compile("ghost")
+
+        def process(self, text):
+            return self._pattern.sub("", text)
+
+        def get_char_index_map(self, raw_text, processed_text):
+            return {}, {}
+
+    preprocessor = CompilingPreprocessor()
+    query_factory = QueryFactory(tokenizer, preprocessor=preprocessor)
+    assert preprocessor.compile_count == 1
+    assert query_factory.preprocessor.process("a ghost girl") == "a  girl"